@@ -1,3 +1,9 @@
 from grg_metrics.nx import *
 from grg_metrics.io import *
 from grg_metrics.metrics import *
+from grg_metrics.fingerprint import *
+from grg_metrics.batch import *
+from grg_metrics.spectral import *
+from grg_metrics.weighted import *
+from grg_metrics.registry import *
+from grg_metrics.distance import *
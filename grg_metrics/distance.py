@@ -0,0 +1,101 @@
+import numpy as np
+from scipy.sparse import csgraph
+import grg_metrics
+
+def _bfs(A, source):
+    return csgraph.dijkstra(A, directed=True, unweighted=True, indices=source).astype(int)
+
+def _components(A):
+    ncomponents, labels = csgraph.connected_components(A, directed=False)
+    return [np.flatnonzero(labels == c) for c in range(ncomponents)]
+
+def _eccentricity_bounds(A, extrema_only=False):
+    """Lower and upper eccentricity bounds for a connected graph with symmetric adjacency `A`.
+
+    Uses the eccentricity bounding scheme of Takes and Kosters. Each BFS from
+    a node v with eccentricity e tightens every node's bounds to
+    max(d(v, w), e - d(v, w)) <= ecc(w) <= e + d(v, w). Sources alternate
+    between the candidate with the largest upper bound and the one with the
+    smallest lower bound, which makes the first few BFS runs double sweeps.
+    A node stops being a candidate once its bounds meet. A leaf's
+    eccentricity is its neighbor's plus one, so leaf bounds follow their
+    neighbor's.
+
+    By default all bounds are made exact, and leaves are never BFS sources.
+    With `extrema_only`, candidates are also dropped when they can no longer
+    change the diameter or the radius. The result is then only guaranteed to
+    have max(lower) equal to the diameter and min(upper) equal to the radius,
+    and this usually takes just a handful of BFS runs.
+    """
+    n = A.shape[0]
+    if n <= 2:
+        ecc = np.full(n, n - 1, dtype=int)
+        return ecc, ecc.copy()
+    degree = np.diff(A.indptr)
+    leaves = np.flatnonzero(degree == 1)
+    leaf_neighbors = A.indices[A.indptr[leaves]]
+    lower = np.zeros(n, dtype=int)
+    upper = np.full(n, n - 1, dtype=int)
+    candidate = np.ones(n, dtype=bool) if extrema_only else degree > 1
+    pick_upper = True
+    while candidate.any():
+        cand = np.flatnonzero(candidate)
+        # ties go to the highest degree node
+        if pick_upper:
+            v = cand[np.argmax(upper[cand]*n + degree[cand])]
+        else:
+            v = cand[np.argmin(lower[cand]*n - degree[cand])]
+        pick_upper = not pick_upper
+        d = _bfs(A, v)
+        e = d.max()
+        lower = np.maximum(lower, np.maximum(d, e - d))
+        upper = np.minimum(upper, e + d)
+        lower[leaves] = np.maximum(lower[leaves], lower[leaf_neighbors] + 1)
+        upper[leaves] = np.minimum(upper[leaves], upper[leaf_neighbors] + 1)
+        candidate &= lower != upper
+        if extrema_only:
+            diameter_low, diameter_up = lower.max(), upper.max()
+            radius_low, radius_up = lower.min(), upper.min()
+            if diameter_low == diameter_up and radius_low == radius_up:
+                break
+            candidate &= ~((upper <= diameter_low) & (2*lower >= diameter_up) &
+                           (lower >= radius_up) & (upper + 1 <= 2*radius_low))
+    return lower, upper
+
+def eccentricities(A):
+    """Exact eccentricity of every node, computed within each node's connected component.
+    `A` is a symmetric sparse adjacency matrix.
+    """
+    A = A.tocsr()
+    ecc = np.zeros(A.shape[0], dtype=int)
+    for nodes in _components(A):
+        if len(nodes) > 1:
+            ecc[nodes] = _eccentricity_bounds(A[nodes][:, nodes])[1]
+    return ecc
+
+def diameter_radius(A):
+    """Exact `(diameter, radius)` of symmetric sparse adjacency matrix `A`.
+
+    The diameter is the largest over all connected components, and the
+    radius is that of the largest component. Both use the extrema-only
+    bounding scheme, so they usually need only a few BFS runs per component.
+    """
+    A = A.tocsr()
+    components = _components(A)
+    largest = max(components, key=len)
+    diameter, radius = 0, 0
+    for nodes in components:
+        if len(nodes) > 1:
+            lower, upper = _eccentricity_bounds(A[nodes][:, nodes], extrema_only=True)
+            diameter = max(diameter, lower.max())
+            if nodes is largest:
+                radius = upper.min()
+    return diameter, radius
+
+def eccentricity_extrema(A, ecc):
+    """`(diameter, radius)` of symmetric sparse adjacency matrix `A` from the
+    exact eccentricities `ecc` of its nodes, with the same conventions as
+    `diameter_radius`. No BFS is needed.
+    """
+    largest = max(_components(A.tocsr()), key=len)
+    return ecc.max(), ecc[largest].min()
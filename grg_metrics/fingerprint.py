@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+import grg_metrics
+
+def adj_trace_moments(G, max_order=4):
+    """Normalized adjacency trace moments (tr(A^k)/n)^(1/k) for k = 2..max_order.
+
+    Traces are computed exactly from sparse products: tr(A^2j) is the squared
+    Frobenius norm of A^j and tr(A^(2j+1)) is the elementwise product sum of
+    A^j and A^(j+1). Taking the k-th root puts every moment on the same scale.
+    """
+    A = grg_metrics.nx2csr(G)
+    n = max(A.shape[0], 1)
+    powers = [None, A]
+    for j in range(2, (max_order + 1)//2 + 1):
+        powers.append(powers[-1].dot(A))
+    moments = []
+    for k in range(2, max_order + 1):
+        j = k//2
+        if k % 2 == 0:
+            trace = powers[j].multiply(powers[j]).sum()
+        else:
+            trace = powers[j].multiply(powers[j + 1]).sum()
+        moments.append((trace/n)**(1.0/k))
+    return np.array(moments)
+
+def fingerprints(metrics, max_degree=10, rich_club_degrees=6, max_moment=4):
+    """Return a DataFrame of fixed-length network fingerprints.
+
+    Input `metrics` is the DataFrame returned by `compute_metrics`; it must
+    have columns 'graph', 'node_degree_distribution', 'degree_assortativity',
+    'rich_club' and 'average_clustering'. Each row contains:
+    - degree_k: fraction of nodes with degree k, for k = 1..max_degree
+      (the last bin collects all larger degrees)
+    - degree_assortativity (0 when undefined)
+    - average_clustering
+    - rich_club_k: unnormalized rich club coefficient for k = 1..rich_club_degrees
+      (0 when no more than one node has degree above k)
+    - adj_moment_k: see `adj_trace_moments`
+    """
+    degree_cols = ['degree_%d' % k for k in range(1, max_degree + 1)]
+    rc_cols = ['rich_club_%d' % k for k in range(1, rich_club_degrees + 1)]
+    moment_cols = ['adj_moment_%d' % k for k in range(2, max_moment + 1)]
+    rows = []
+    for i in metrics.index:
+        degrees = np.minimum(metrics.node_degree_distribution[i], max_degree)
+        hist = np.bincount(degrees, minlength=max_degree + 1)[1:]/max(len(degrees), 1)
+        assortativity = metrics.degree_assortativity[i]
+        if not np.isfinite(assortativity):
+            assortativity = 0.0
+        rc = metrics.rich_club[i]
+        rc_profile = [rc.get(k, 0.0) for k in range(1, rich_club_degrees + 1)]
+        moments = adj_trace_moments(metrics.graph[i], max_order=max_moment)
+        rows.append(np.concatenate([hist, [assortativity, metrics.average_clustering[i]],
+                                    rc_profile, moments]))
+    columns = degree_cols + ['degree_assortativity', 'average_clustering'] + rc_cols + moment_cols
+    return pd.DataFrame(rows, index=metrics.index, columns=columns, dtype=float)
+
+class FingerprintIndex:
+    """k-nearest-neighbor index over network fingerprints.
+
+        index = FingerprintIndex(reference_metrics)
+        matches = index.query(metrics, k=3)
+
+    Fingerprint columns are standardized with the reference mean and standard
+    deviation so that no single feature dominates the Euclidean distance.
+    Queries use a k-d tree, so they stay fast for tens of thousands of
+    reference networks.
+    """
+    def __init__(self, reference):
+        if 'graph' in reference:
+            reference = fingerprints(reference)
+        self.fingerprints = reference
+        self.center = reference.mean()
+        self.scale = reference.std(ddof=0).replace(0, 1).fillna(1)
+        self.tree = cKDTree(self._standardize(reference))
+
+    def _standardize(self, fps):
+        return ((fps[self.fingerprints.columns] - self.center)/self.scale).values
+
+    def query(self, x, k=5):
+        """Return the `k` reference networks closest to each network in `x`.
+
+        Input `x` is either a `compute_metrics` DataFrame or the output of
+        `fingerprints`. The result has one row per match with columns
+        'query', 'rank' (starting at 1), 'reference' and 'distance'.
+        """
+        if 'graph' in x:
+            x = fingerprints(x)
+        k = min(k, len(self.fingerprints))
+        dist, idx = self.tree.query(self._standardize(x), k=k)
+        dist, idx = dist.reshape(len(x), k), idx.reshape(len(x), k)
+        refs = np.asarray(self.fingerprints.index)
+        return pd.DataFrame({
+            'query': np.repeat(np.asarray(x.index), k),
+            'rank': np.tile(np.arange(1, k + 1), len(x)),
+            'reference': refs[idx.ravel()],
+            'distance': dist.ravel()
+            }, columns=['query', 'rank', 'reference', 'distance'])
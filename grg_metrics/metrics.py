@@ -45,13 +45,71 @@ def fiedler_value(graphs, Gids):
     metrics = [nx.algebraic_connectivity(G) for G in graphs]
     return pd.Series(metrics, index=Gids, name='fiedler_value')
 
-def compute_metrics(x, compute_average_shortest_path_length=False, compute_fiedler_value=False, compute_adj_spectral_radius=False, compute_maximal_cliques=False):
+def adj_spectral_radius(graphs, Gids):
+    """Largest Eigenvalue of the adjacency matrix.
+    """
+    metrics = [grg_metrics.spectral_radius(grg_metrics.nx2csr(G)) for G in graphs]
+    return pd.Series(metrics, index=Gids, name='adj_spectral_radius')
+
+def degree_metrics(graphs, Gids):
+    """Degree and clustering metrics computed one graph at a time.
+    See `batch_metrics` for the batched equivalent.
+    """
+    metrics = pd.DataFrame(index=Gids)
+    metrics['node_degree_distribution'] = node_degree_distribution(graphs, Gids)
+    metrics['degree_assortativity'] = degree_assortativity(graphs, Gids)
+    metrics['rich_club'] = rich_club(graphs, Gids)
+    metrics['clustering'] = clustering(graphs, Gids)
+    metrics['average_clustering'] = average_clustering(graphs, Gids)
+    return metrics
+
+def compute_metrics(x, compute_average_shortest_path_length=False, compute_fiedler_value=False, compute_adj_spectral_radius=False, compute_maximal_cliques=False, compute_spectral_density=False, compute_weighted_metrics=False, compute_eccentricity=False, batched=False, metrics=None, options=None):
     """
         metrics = compute_metrics(dir_path)
         metrics = compute_metrics(list_of_file_paths)
         metrics = compute_metrics(list_of_networkx_graphs)
+        metrics = compute_metrics(x, metrics=['max_degree', 'rich_club'])
     Return a DataFrame with metric data.
+
+    `metrics` lists the registered metrics to compute (default:
+    `DEFAULT_METRICS`, plus any enabled by the `compute_*` flags). Only
+    the metrics and intermediates those columns depend on are computed, once
+    per graph; see `register_metric`. `options` maps a metric or input name
+    to keyword arguments for it, e.g. `{'laplacian_spectral_density': {'n_probes': 32}}`.
+    Metrics computed from a shared input take their keyword arguments under
+    the input's name: the weighted metrics use `effective_resistance_stats`
+    (see `effective_resistance_stats`) and `impedance_path_stats` (see
+    `impedance_path_stats`).
+
+    Metrics are computed from `nx2csr` adjacency matrices, which drop
+    self-loops; degrees therefore count only edges to other nodes.
+
+    With `batched=True`, degree and clustering metrics for 'tiny' and 'small'
+    networks are computed together by `batch_metrics`, which avoids
+    per-graph overhead on collections of many small networks. It has no
+    effect when none of those metrics is needed.
     """
+    names = list(grg_metrics.DEFAULT_METRICS if metrics is None else metrics)
+    flags = [
+        (compute_maximal_cliques, ['maximal_cliques']),
+        (compute_adj_spectral_radius, ['adj_spectral_radius']),
+        (compute_fiedler_value, ['fiedler_value']),
+        (compute_spectral_density, ['laplacian_spectral_density', 'adj_spectral_density']),
+        (compute_average_shortest_path_length, ['average_shortest_path_length']),
+        (compute_eccentricity, ['eccentricity', 'mean_eccentricity']),
+        (compute_weighted_metrics, ['average_impedance_path_length', 'impedance_diameter',
+                                    'average_effective_resistance', 'max_edge_effective_resistance'])
+        ]
+    for flag, flag_names in flags:
+        if flag:
+            names += [name for name in flag_names if name not in names]
+    unknown = [name for name in names
+               if name not in grg_metrics.METRICS or not grg_metrics.METRICS[name]['column']]
+    if unknown:
+        print('Unknown metrics: %s. Available metrics: %s.' % (', '.join(unknown),
+              ', '.join(k for k, v in grg_metrics.METRICS.items() if v['column'])))
+        return []
+
     if isinstance(x, str):
         # assume input is directory
         files = grg_metrics.find_files(x)
@@ -83,22 +141,24 @@ def compute_metrics(x, compute_average_shortest_path_length=False, compute_fiedl
     labels = ['tiny', 'small', 'medium', 'large']
     size_groups = pd.cut(metrics.nodes, bins, labels=labels)
     metrics['size'] = size_groups
-    metrics['node_degree_distribution'] = node_degree_distribution(graphs, Gids)
-    metrics['max_degree'] = metrics['node_degree_distribution'].apply(max)
-    metrics['mean_degree'] = metrics['node_degree_distribution'].apply(np.mean)
-    metrics['median_degree'] = metrics['node_degree_distribution'].apply(np.median)
-    metrics['degree_assortativity'] = degree_assortativity(graphs, Gids)
-    metrics['rich_club'] = rich_club(graphs, Gids)
-    metrics['clustering'] = clustering(graphs, Gids)
-    metrics['average_clustering'] = average_clustering(graphs, Gids)
-    if compute_maximal_cliques:
-        metrics['maximal_cliques'] = maximal_cliques(graphs, Gids)
-    if compute_adj_spectral_radius:
-        metrics['adj_spectral_radius'] = adj_spectral_radius(graphs, Gids)
-    if compute_fiedler_value:
-        metrics['fiedler_value'] = fiedler_value(graphs, Gids)
-    if compute_average_shortest_path_length:
-        metrics['average_shortest_path_length'] = average_shortest_path_length(graphs, Gids)
+
+    caches = [dict() for G in graphs]
+    # batched results, plus the shared adjacency and degree inputs; batching
+    # only pays off when one of the batched metrics is needed
+    needed = grg_metrics.metric_dependencies(names)
+    batch_names = [name for name in ['node_degree_distribution', 'degree_assortativity', 'rich_club',
+                                     'clustering', 'average_clustering'] if name in needed]
+    if batched and batch_names:
+        batch_names += [name for name in ['adjacency', 'degree'] if name in needed]
+        small = np.flatnonzero(metrics['size'].isin(['tiny', 'small']).values)
+        batch = grg_metrics.batch_metrics([graphs[i] for i in small], [Gids[i] for i in small], inputs=True)
+        for j, i in enumerate(small):
+            caches[i].update({name: batch[name].iloc[j] for name in batch_names})
+
+    values = [grg_metrics.evaluate_metrics(G, names, options=options, cache=cache)
+              for G, cache in zip(graphs, caches)]
+    for name in names:
+        metrics[name] = pd.Series([v[name] for v in values], index=Gids)
     return metrics
 
 def check_max_degree(metrics, describe=True):
@@ -1,6 +1,7 @@
 import os, json
 import networkx as nx
 import numpy as np
+import scipy.sparse as sp
 import warnings
 import grg_grgdata
 
@@ -18,6 +19,33 @@ def walk_components(grg_data):
                     for nested_key, nested_value in walk_components(value[key]):
                         yield nested_key, nested_value
 
+def nx2csr(G, weight=None, nodelist=None):
+    """Return the adjacency matrix of networkx graph `G` in scipy CSR format.
+
+    Rows and columns follow `nodelist` (default: `G.nodes()` order). If
+    `weight` is a callable it is applied to each edge's attribute dict;
+    otherwise edges get weight 1. Self-loops are dropped, so the row counts
+    of the result are degrees without self-loops (`nx.degree` counts each
+    self-loop twice).
+    """
+    if nodelist is None:
+        nodelist = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodelist)}
+    n = len(nodelist)
+    rows, cols, vals = [], [], []
+    for u, v, d in G.edges(data=True):
+        if u == v:
+            continue
+        rows.append(index[u])
+        cols.append(index[v])
+        vals.append(1.0 if weight is None else weight(d))
+    rows, cols = np.array(rows, dtype=int), np.array(cols, dtype=int)
+    vals = np.array(vals, dtype=float)
+    A = sp.coo_matrix((np.concatenate([vals, vals]),
+                       (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+                      shape=(n, n))
+    return A.tocsr()
+
 def grg2nx(data, remove_stepup_transformers=False):
     """Given a GRGv4.0 JSON document, return a networkx graph.
 
@@ -0,0 +1,173 @@
+import networkx as nx
+import numpy as np
+import grg_metrics
+
+# name -> {'func': ..., 'requires': (...), 'column': bool, 'alternatives': ((func, requires), ...)}
+METRICS = {}
+
+# computed by compute_metrics when no metric names are given
+DEFAULT_METRICS = [
+    'node_degree_distribution',
+    'max_degree',
+    'mean_degree',
+    'median_degree',
+    'degree_assortativity',
+    'rich_club',
+    'clustering',
+    'average_clustering',
+    'diameter',
+    'radius'
+    ]
+
+# columns needed by analyze_metrics (besides 'nodes', which is always present)
+ANALYZE_METRICS = [
+    'node_degree_distribution',
+    'max_degree',
+    'mean_degree',
+    'median_degree',
+    'degree_assortativity',
+    'rich_club'
+    ]
+
+def register_metric(name, func, requires=(), column=True, alternatives=()):
+    """Add a metric to the registry, replacing any metric of the same name.
+
+    `func` is called once per graph as `func(G, **inputs)`. `inputs` maps each
+    name in `requires` to its value for `G`, plus any options given for `name`
+    through `compute_metrics(..., options={name: {...}})`. Registered metrics
+    can be requested by name from `compute_metrics`.
+
+    `alternatives` is a sequence of `(func, requires)` pairs that give the
+    same value more cheaply from other inputs. The first one whose inputs
+    are all cached or needed anyway by the same `evaluate_metrics` call is
+    used instead of `func`.
+
+    Example:
+        register_metric('leaves', lambda G, degree: np.sum(degree == 1), requires=['degree'])
+        metrics = compute_metrics(dir_path, metrics=['leaves', 'max_degree'])
+    """
+    METRICS[name] = {'func': func, 'requires': tuple(requires), 'column': column,
+                     'alternatives': tuple((f, tuple(r)) for f, r in alternatives)}
+
+def register_input(name, func, requires=(), alternatives=()):
+    """Register an intermediate quantity shared by several metrics.
+    Inputs work like metrics, but are not computed unless something needs them.
+    """
+    register_metric(name, func, requires=requires, column=False, alternatives=alternatives)
+
+def metric_dependencies(names):
+    """Return `names` and everything they depend on, in evaluation order."""
+    order = []
+    def visit(name, path):
+        if name in path:
+            raise ValueError('Circular metric dependency: %s' % ' -> '.join(path + [name]))
+        if name not in order:
+            for r in METRICS[name]['requires']:
+                visit(r, path + [name])
+            order.append(name)
+    for name in names:
+        visit(name, [])
+    return order
+
+def _evaluate(name, G, cache, options, available):
+    if name not in cache:
+        spec = METRICS[name]
+        func, requires = spec['func'], spec['requires']
+        for alt_func, alt_requires in spec['alternatives']:
+            if (all(r in available or r in cache for r in alt_requires) and
+                    name not in metric_dependencies(alt_requires)):
+                func, requires = alt_func, alt_requires
+                break
+        kwargs = {r: _evaluate(r, G, cache, options, available) for r in requires}
+        kwargs.update(options.get(name, {}))
+        cache[name] = func(G, **kwargs)
+    return cache[name]
+
+def evaluate_metrics(G, names, options=None, cache=None):
+    """Compute the registered metrics `names` for graph `G`.
+
+    Each metric and input is computed at most once, and only when something
+    in `names` needs it. Values already in `cache` (a dict, which is updated
+    in place) are reused. Returns a dict mapping each name to its value.
+    """
+    options = {} if options is None else options
+    cache = {} if cache is None else cache
+    available = set(metric_dependencies(names))
+    return {name: _evaluate(name, G, cache, options, available) for name in names}
+
+def _single(degree):
+    return np.zeros(len(degree), dtype=int)
+
+# shared intermediates
+register_input('adjacency', lambda G: grg_metrics.nx2csr(G))
+register_input('degree', lambda G, adjacency: np.diff(adjacency.indptr).astype(int),
+               requires=['adjacency'])
+register_input('triangles', lambda G, adjacency: grg_metrics.batch_triangles(adjacency),
+               requires=['adjacency'])
+register_input('local_clustering', lambda G, degree, triangles: grg_metrics.local_clustering(degree, triangles),
+               requires=['degree', 'triangles'])
+register_input('laplacian', lambda G, adjacency, degree: grg_metrics.laplacian(adjacency, degree),
+               requires=['adjacency', 'degree'])
+# exact eccentricities, when computed anyway, give both without another bounding pass
+register_input('diameter_radius', lambda G, adjacency: grg_metrics.diameter_radius(adjacency),
+               requires=['adjacency'],
+               alternatives=[(lambda G, adjacency, eccentricities: grg_metrics.eccentricity_extrema(adjacency, eccentricities),
+                              ['adjacency', 'eccentricities'])])
+register_input('eccentricities', lambda G, adjacency: grg_metrics.eccentricities(adjacency),
+               requires=['adjacency'])
+register_input('impedance_path_stats', grg_metrics.impedance_path_stats)
+register_input('effective_resistance_stats', grg_metrics.effective_resistance_stats)
+
+# degree and clustering metrics
+register_metric('node_degree_distribution', lambda G, degree: np.flipud(np.sort(degree)),
+                requires=['degree'])
+register_metric('max_degree', lambda G, node_degree_distribution: max(node_degree_distribution),
+                requires=['node_degree_distribution'])
+register_metric('mean_degree', lambda G, node_degree_distribution: np.mean(node_degree_distribution),
+                requires=['node_degree_distribution'])
+register_metric('median_degree', lambda G, node_degree_distribution: np.median(node_degree_distribution),
+                requires=['node_degree_distribution'])
+register_metric('degree_assortativity',
+                lambda G, adjacency, degree: grg_metrics.batch_degree_assortativity(
+                    adjacency, _single(degree), 1, degree=degree)[0],
+                requires=['adjacency', 'degree'])
+register_metric('rich_club',
+                lambda G, adjacency, degree: grg_metrics.batch_rich_club(
+                    adjacency, _single(degree), 1, degree=degree)[0],
+                requires=['adjacency', 'degree'])
+register_metric('clustering', lambda G, local_clustering: np.flipud(np.sort(local_clustering)),
+                requires=['local_clustering'])
+register_metric('average_clustering', lambda G, local_clustering: np.mean(local_clustering),
+                requires=['local_clustering'])
+
+# path-length extremes
+register_metric('diameter', lambda G, diameter_radius: diameter_radius[0],
+                requires=['diameter_radius'])
+register_metric('radius', lambda G, diameter_radius: diameter_radius[1],
+                requires=['diameter_radius'])
+
+# optional metrics
+register_metric('eccentricity', lambda G, eccentricities: np.flipud(np.sort(eccentricities)),
+                requires=['eccentricities'])
+register_metric('mean_eccentricity', lambda G, eccentricities: np.mean(eccentricities),
+                requires=['eccentricities'])
+register_metric('load_centrality', lambda G: nx.load_centrality(G))
+register_metric('average_shortest_path_length', lambda G: nx.average_shortest_path_length(G))
+register_metric('maximal_cliques', lambda G: list(nx.clique.find_cliques(G)))
+register_metric('fiedler_value', lambda G: nx.algebraic_connectivity(G))
+register_metric('adj_spectral_radius', lambda G, adjacency: grg_metrics.spectral_radius(adjacency),
+                requires=['adjacency'])
+register_metric('laplacian_spectral_density',
+                lambda G, adjacency, degree, **kwargs: grg_metrics.laplacian_density(adjacency, degree, **kwargs),
+                requires=['adjacency', 'degree'])
+register_metric('adj_spectral_density',
+                lambda G, adjacency, degree, **kwargs: grg_metrics.adj_density(adjacency, degree, **kwargs),
+                requires=['adjacency', 'degree'])
+register_metric('average_impedance_path_length', lambda G, impedance_path_stats: impedance_path_stats[0],
+                requires=['impedance_path_stats'])
+register_metric('impedance_diameter', lambda G, impedance_path_stats: impedance_path_stats[1],
+                requires=['impedance_path_stats'])
+register_metric('average_effective_resistance', lambda G, effective_resistance_stats: effective_resistance_stats[0],
+                requires=['effective_resistance_stats'])
+register_metric('max_edge_effective_resistance', lambda G, effective_resistance_stats: effective_resistance_stats[1],
+                requires=['effective_resistance_stats'])
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from numpy.polynomial import chebyshev, polynomial
+import grg_metrics
+
+def kpm_moments(M, lower, upper, n_moments=64, n_probes=16, seed=0):
+    """Stochastic estimate of the Chebyshev moments of sparse symmetric `M`.
+
+    `M` is rescaled to H = (M - b*I)/a so that its spectrum [lower, upper]
+    maps into [-1, 1], and mu_k = tr(T_k(H))/n is estimated with `n_probes`
+    Rademacher vectors via the Chebyshev three-term recurrence. Cost is
+    O(n_moments * n_probes * nnz(M)).
+
+    Returns `(mu, a, b)`.
+    """
+    n = M.shape[0]
+    a = (upper - lower)/2.0*1.01
+    b = (upper + lower)/2.0
+    if a == 0:
+        a = 1.0
+    H = (sp.csr_matrix(M, dtype=float) - b*sp.identity(n, format='csr'))/a
+    rng = np.random.RandomState(seed)
+    Z = rng.choice([-1.0, 1.0], size=(n, n_probes))
+    mu = np.zeros(n_moments)
+    T_prev, T_cur = Z, H.dot(Z)
+    mu[0] = 1.0
+    if n_moments > 1:
+        mu[1] = np.sum(Z*T_cur)/(n*n_probes)
+    for k in range(2, n_moments):
+        T_prev, T_cur = T_cur, 2*H.dot(T_cur) - T_prev
+        mu[k] = np.sum(Z*T_cur)/(n*n_probes)
+    return mu, a, b
+
+def jackson_kernel(n_moments):
+    """Jackson damping factors, which suppress Gibbs oscillations."""
+    N = n_moments + 1
+    k = np.arange(n_moments)
+    return ((N - k)*np.cos(np.pi*k/N) + np.sin(np.pi*k/N)/np.tan(np.pi/N))/N
+
+def spectral_density(M, lower, upper, n_moments=64, n_probes=16, bins=20, max_power=4, seed=0):
+    """Estimate the eigenvalue density of sparse symmetric `M` with the kernel polynomial method.
+
+    `lower` and `upper` must bound the spectrum of `M`. Returns a dict with
+    - bin_edges: `bins` + 1 equally spaced edges on [lower, upper]
+    - density: fraction of eigenvalues in each bin
+    - moments: estimates of tr(M^j)/n for j = 1..max_power
+
+    `n_moments` must exceed `max_power`.
+    """
+    if n_moments <= max_power:
+        raise ValueError('n_moments (%d) must be greater than max_power (%d)' % (n_moments, max_power))
+    mu, a, b = kpm_moments(M, lower, upper, n_moments=n_moments, n_probes=n_probes, seed=seed)
+    g = jackson_kernel(n_moments)
+
+    # integrate the damped Chebyshev expansion exactly over each bin
+    bin_edges = np.linspace(lower, upper, bins + 1)
+    theta = np.arccos(np.clip((bin_edges - b)/a, -1, 1))
+    k = np.arange(1, n_moments)
+    antiderivative = (g[0]*mu[0]*theta
+                      + 2*np.sin(np.outer(theta, k)).dot(g[1:]*mu[1:]/k))/np.pi
+    density = np.clip(antiderivative[:-1] - antiderivative[1:], 0, None)
+    if density.sum() > 0:
+        density = density/density.sum()
+
+    # (a*x + b)^j in the Chebyshev basis, paired with the undamped moments
+    moments = np.zeros(max_power)
+    for j in range(1, max_power + 1):
+        coef = chebyshev.poly2cheb(polynomial.polypow([b, a], j))
+        moments[j - 1] = coef.dot(mu[:len(coef)])
+    return {'bin_edges': bin_edges, 'density': density, 'moments': moments}
+
+def spectral_radius(A):
+    """Largest Eigenvalue of sparse nonnegative symmetric matrix `A`."""
+    if A.shape[0] < 3 or A.nnz == 0:
+        return np.max(np.abs(np.linalg.eigvalsh(A.toarray())), initial=0)
+    return spla.eigsh(A, k=1, which='LA', return_eigenvectors=False)[0]
+
+def laplacian(A, degree):
+    """Graph Laplacian D - A from sparse adjacency `A` and node `degree`."""
+    return sp.diags(degree.astype(float)) - A
+
+def laplacian_density(A, degree, **kwargs):
+    """Laplacian spectral density of one graph with adjacency `A`; see `spectral_density`.
+    The spectrum is bounded by [0, 2*max_degree].
+    """
+    return spectral_density(laplacian(A, degree), 0, 2*degree.max(), **kwargs)
+
+def adj_density(A, degree, **kwargs):
+    """Adjacency spectral density of one graph with adjacency `A`; see `spectral_density`.
+    The spectrum is bounded by [-max_degree, max_degree].
+    """
+    return spectral_density(A, -degree.max(), degree.max(), **kwargs)
+
+def laplacian_spectral_density(graphs, Gids, **kwargs):
+    """Estimated Laplacian eigenvalue density; see `laplacian_density`,
+    which gets the keyword arguments.
+    """
+    metrics = []
+    for G in graphs:
+        A = grg_metrics.nx2csr(G)
+        metrics.append(laplacian_density(A, np.diff(A.indptr), **kwargs))
+    return pd.Series(metrics, index=Gids, name='laplacian_spectral_density')
+
+def adj_spectral_density(graphs, Gids, **kwargs):
+    """Estimated adjacency eigenvalue density; see `adj_density`, which
+    gets the keyword arguments.
+    """
+    metrics = []
+    for G in graphs:
+        A = grg_metrics.nx2csr(G)
+        metrics.append(adj_density(A, np.diff(A.indptr), **kwargs))
+    return pd.Series(metrics, index=Gids, name='adj_spectral_density')
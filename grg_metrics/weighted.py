@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from scipy.sparse import csgraph
+import grg_metrics
+
+def _value(v):
+    """Number from a GRG abstract value (a number or an 'lb'/'ub' domain)."""
+    if isinstance(v, dict):
+        if 'lb' in v and 'ub' in v:
+            return (float(v['lb']) + float(v['ub']))/2
+        return np.nan
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+def edge_impedance(d, weight='reactance'):
+    """Impedance of an edge, given its networkx attribute dict.
+
+    `weight` can be 'reactance', 'resistance' or 'magnitude' (|r + jx|).
+    Returns nan when the edge has no impedance (e.g. transformers, whose
+    impedance `grg2nx` does not copy).
+    """
+    z = d.get('impedance')
+    if not isinstance(z, dict):
+        return np.nan
+    r, x = _value(z.get('resistance')), _value(z.get('reactance'))
+    if weight == 'reactance':
+        return abs(x)
+    elif weight == 'resistance':
+        return abs(r)
+    elif weight == 'magnitude':
+        return np.hypot(r, x)
+    raise ValueError("weight must be 'reactance', 'resistance' or 'magnitude'")
+
+def impedance_matrix(G, weight='reactance'):
+    """Sparse matrix of edge impedances, in `G.nodes()` order.
+
+    Edges with a missing or non-positive impedance get the median positive
+    impedance of the graph (or 1 if there is none), so that every edge of
+    `G` stays in the matrix.
+    """
+    Z = grg_metrics.nx2csr(G, weight=lambda d: edge_impedance(d, weight))
+    valid = np.isfinite(Z.data) & (Z.data > 0)
+    fill = np.median(Z.data[valid]) if valid.any() else 1.0
+    Z.data[~valid] = fill
+    return Z
+
+def conductance_matrix(G, weight='reactance'):
+    """Sparse matrix of edge conductances (reciprocal impedances)."""
+    C = impedance_matrix(G, weight=weight)
+    C.data = 1/C.data
+    return C
+
+class LaplacianSolver:
+    """Solves L x = b for the weighted Laplacian of a graph, reusing one factorization.
+
+        solver = LaplacianSolver(C)
+        x = solver.solve(b)
+
+    `C` is a sparse symmetric conductance matrix. One node per connected
+    component is grounded, which leaves a nonsingular matrix that is
+    LU-factorized once. For right-hand sides that sum to zero on every
+    component, `solve` returns a solution that is exact up to a constant
+    per component. This is all that potential differences need.
+    """
+    def __init__(self, C):
+        C = sp.csr_matrix(C)
+        self.n = C.shape[0]
+        self.ncomponents, self.labels = csgraph.connected_components(C, directed=False)
+        grounded = np.zeros(self.n, dtype=bool)
+        grounded[np.unique(self.labels, return_index=True)[1]] = True
+        self.keep = np.flatnonzero(~grounded)
+        L = sp.diags(np.asarray(C.sum(axis=1)).ravel()) - C
+        L = L.tocsr()[self.keep][:, self.keep]
+        self.lu = spla.splu(L.tocsc()) if len(self.keep) else None
+
+    def solve(self, b):
+        """Solve for one right-hand side (length n) or many (n x k)."""
+        b = np.asarray(b, dtype=float)
+        x = np.zeros(b.shape)
+        if self.lu is not None:
+            x[self.keep] = self.lu.solve(np.ascontiguousarray(b[self.keep]))
+        return x
+
+def effective_resistance(G, pairs, weight='reactance', solver=None):
+    """Exact effective resistance between each `(u, v)` node pair of `G`.
+
+    Pass a `LaplacianSolver` built from the conductance matrix of `G` to reuse
+    its factorization across calls. Pairs in different components are inf.
+    """
+    if solver is None:
+        solver = LaplacianSolver(conductance_matrix(G, weight=weight))
+    index = {node: i for i, node in enumerate(G.nodes())}
+    i = np.array([index[u] for u, v in pairs], dtype=int)
+    j = np.array([index[v] for u, v in pairs], dtype=int)
+    b = np.zeros((solver.n, len(i)))
+    b[i, np.arange(len(i))] += 1
+    b[j, np.arange(len(j))] -= 1
+    x = solver.solve(b)
+    cols = np.arange(len(i))
+    R = x[i, cols] - x[j, cols]
+    R[solver.labels[i] != solver.labels[j]] = np.inf
+    return R
+
+def resistance_embedding(C, solver, n_projections=100, seed=0):
+    """Random projection embedding for approximate effective resistances.
+
+    Returns an n x `n_projections` matrix Y whose row distances satisfy
+    ||Y_u - Y_v||^2 ~ R(u, v). It uses the Johnson-Lindenstrauss sketch of
+    Spielman and Srivastava, which costs one solve per projection.
+    """
+    E = sp.triu(C, k=1).tocoo()
+    m = len(E.data)
+    rng = np.random.RandomState(seed)
+    Q = rng.choice([-1.0, 1.0], size=(m, n_projections))*np.sqrt(E.data)[:, None]/np.sqrt(n_projections)
+    # incidence-transpose times the weighted projections
+    b = np.zeros((C.shape[0], n_projections))
+    np.add.at(b, E.row, Q)
+    np.add.at(b, E.col, -Q)
+    return solver.solve(b)
+
+def _edge_resistance(E, edges, solver, chunk_size=256):
+    """Exact effective resistance across the edges of `E` (a COO matrix) indexed by `edges`."""
+    R = np.zeros(len(edges))
+    for start in range(0, len(edges), chunk_size):
+        chunk = edges[start:start + chunk_size]
+        cols = np.arange(len(chunk))
+        b = np.zeros((solver.n, len(chunk)))
+        b[E.row[chunk], cols] = 1
+        b[E.col[chunk], cols] = -1
+        x = solver.solve(b)
+        R[start:start + len(chunk)] = x[E.row[chunk], cols] - x[E.col[chunk], cols]
+    return R
+
+def _refine_max_edge_resistance(E, estimate, solver, n_projections, chunk_size=256):
+    """Replace the random projection estimates that could be the maximum by exact values.
+
+    The projected estimates have a relative standard deviation of about
+    sqrt(2/n_projections), so taking their maximum is biased upward. Edges
+    are solved exactly in chunks, in decreasing order of their estimate,
+    until the estimates fall more than three standard deviations below the
+    largest exact resistance found so far. The remaining estimates are capped
+    at that threshold.
+    """
+    shrink = 1 - 3*np.sqrt(2.0/n_projections)
+    order = np.argsort(-estimate)
+    refined = estimate.copy()
+    solved = np.zeros(len(estimate), dtype=bool)
+    threshold = -np.inf
+    for start in range(0, len(order), chunk_size):
+        chunk = order[start:start + chunk_size]
+        chunk = chunk[estimate[chunk] >= threshold]
+        if len(chunk) == 0:
+            break
+        refined[chunk] = _edge_resistance(E, chunk, solver, chunk_size)
+        solved[chunk] = True
+        threshold = max(threshold, refined[chunk].max()*shrink)
+    refined[~solved] = np.minimum(estimate[~solved], threshold)
+    return refined
+
+def effective_resistance_stats(G, weight='reactance', method='auto', exact_max_nodes=1000, n_projections=100, seed=0):
+    """`(average_effective_resistance, max_edge_effective_resistance)` of graph `G`.
+
+    - average_effective_resistance: mean over all node pairs in the same component
+    - max_edge_effective_resistance: largest effective resistance across a branch
+
+    `weight` is passed to `edge_impedance`. `method` is 'exact' (inverse of
+    the factorized grounded Laplacian), 'approx' (random projections, see
+    `resistance_embedding`) or 'auto', which is exact for networks with at
+    most `exact_max_nodes` buses. In 'approx' mode the average is a
+    projection estimate with a relative standard error of at most about
+    sqrt(2/n_projections). The branches that could hold the maximum are then
+    re-solved exactly, since a maximum taken over noisy estimates is biased
+    upward.
+    """
+    C = conductance_matrix(G, weight=weight)
+    n = C.shape[0]
+    solver = LaplacianSolver(C)
+    if method == 'auto':
+        method = 'exact' if n <= exact_max_nodes else 'approx'
+
+    if method == 'exact':
+        # M is the inverse of the grounded Laplacian, padded with zeros
+        M = solver.solve(np.identity(n))
+        diag = np.diag(M)
+        E = sp.triu(C, k=1).tocoo()
+        edge_R = diag[E.row] + diag[E.col] - 2*M[E.row, E.col]
+    elif method == 'approx':
+        Y = resistance_embedding(C, solver, n_projections=n_projections, seed=seed)
+        E = sp.triu(C, k=1).tocoo()
+        edge_R = _refine_max_edge_resistance(E, np.sum((Y[E.row] - Y[E.col])**2, axis=1),
+                                             solver, n_projections)
+    else:
+        raise ValueError("method must be 'auto', 'exact' or 'approx'")
+
+    # sum of R over the pairs of a component with n_c nodes:
+    # n_c*tr(M_c) - 1'M_c1 exactly, or n_c*sum ||Y_i - mean(Y)||^2 approximately
+    total, pairs = 0.0, 0
+    for c in range(solver.ncomponents):
+        nodes = np.flatnonzero(solver.labels == c)
+        nc = len(nodes)
+        if nc < 2:
+            continue
+        if method == 'exact':
+            Mc = M[np.ix_(nodes, nodes)]
+            total += nc*np.trace(Mc) - Mc.sum()
+        else:
+            Yc = Y[nodes]
+            total += nc*np.sum((Yc - Yc.mean(axis=0))**2)
+        pairs += nc*(nc - 1)//2
+    average = total/pairs if pairs else np.nan
+    maximum = edge_R.max() if len(edge_R) else np.nan
+    return average, maximum
+
+def effective_resistance_metrics(graphs, Gids, **kwargs):
+    """Electrical distance statistics from the impedance-weighted Laplacian.
+
+    Columns 'average_effective_resistance' and 'max_edge_effective_resistance';
+    see `effective_resistance_stats`, which gets the keyword arguments.
+    """
+    stats = [effective_resistance_stats(G, **kwargs) for G in graphs]
+    return pd.DataFrame(stats, index=Gids,
+                        columns=['average_effective_resistance', 'max_edge_effective_resistance'])
+
+def impedance_path_stats(G, weight='reactance', chunk_size=256):
+    """`(average_impedance_path_length, impedance_diameter)` of graph `G`.
+
+    - average_impedance_path_length: mean over all connected node pairs
+    - impedance_diameter: longest impedance-weighted shortest path
+
+    `weight` is passed to `edge_impedance`. Dijkstra runs from `chunk_size`
+    sources at a time, so memory stays bounded. Like
+    `average_shortest_path_length`, this is expensive for large networks.
+    """
+    Z = impedance_matrix(G, weight=weight)
+    n = Z.shape[0]
+    total, count, longest = 0.0, 0, 0.0
+    for start in range(0, n, chunk_size):
+        D = csgraph.dijkstra(Z, directed=False, indices=np.arange(start, min(n, start + chunk_size)))
+        D = D[np.isfinite(D) & (D > 0)]
+        total += D.sum()
+        count += len(D)
+        if len(D):
+            longest = max(longest, D.max())
+    return total/count if count else np.nan, longest
+
+def impedance_path_metrics(graphs, Gids, **kwargs):
+    """Impedance-weighted shortest path statistics.
+
+    Columns 'average_impedance_path_length' and 'impedance_diameter'; see
+    `impedance_path_stats`, which gets the keyword arguments.
+    """
+    stats = [impedance_path_stats(G, **kwargs) for G in graphs]
+    return pd.DataFrame(stats, index=Gids,
+                        columns=['average_impedance_path_length', 'impedance_diameter'])
@@ -0,0 +1,232 @@
+# metric tests on small synthetic networks; no GRG data needed
+import os, sys
+import pytest
+import numpy as np
+import scipy.sparse as sp
+import networkx as nx
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import grg_metrics
+
+def synthetic_graphs():
+    graphs = []
+    for i, n in enumerate([12, 40, 75, 150]):
+        G = nx.connected_watts_strogatz_graph(n, 4, 0.2, seed=i)
+        G.graph['id'] = 'ws_%d' % n
+        graphs.append(G)
+    G = nx.grid_2d_graph(6, 8)
+    G.graph['id'] = 'grid_48'
+    graphs.append(G)
+    return graphs
+
+def test_adj_trace_moments():
+    """tr(A^k) of K4 is 12, 24, 84 for k = 2, 3, 4."""
+    moments = grg_metrics.adj_trace_moments(nx.complete_graph(4), max_order=4)
+    assert np.allclose(moments**np.array([2, 3, 4]), [3, 6, 21])
+
+def test_fingerprint_index():
+    metrics = grg_metrics.compute_metrics(synthetic_graphs())
+    fps = grg_metrics.fingerprints(metrics)
+    assert fps.shape == (5, 21)
+    assert np.allclose(fps.filter(like='degree_').iloc[:, :10].sum(axis=1), 1)
+
+    index = grg_metrics.FingerprintIndex(metrics)
+    matches = index.query(metrics, k=2)
+    best = matches[matches['rank'] == 1]
+    assert list(best.reference) == list(metrics.index)
+    assert np.allclose(best.distance, 0)
+    assert (matches[matches['rank'] == 2].distance > 0).all()
+
+def test_batch_metrics():
+    """Batched kernels must reproduce the per-graph networkx results."""
+    graphs = synthetic_graphs()
+    Gids = [G.graph['id'] for G in graphs]
+    expected = grg_metrics.degree_metrics(graphs, Gids)
+    batch = grg_metrics.batch_metrics(graphs, Gids)
+    for i in Gids:
+        assert np.array_equal(batch.node_degree_distribution[i], expected.node_degree_distribution[i])
+        assert np.allclose(batch.clustering[i], expected.clustering[i])
+        assert np.isclose(batch.average_clustering[i], expected.average_clustering[i])
+        assert np.isclose(batch.degree_assortativity[i], expected.degree_assortativity[i], equal_nan=True)
+        assert sorted(batch.rich_club[i]) == sorted(expected.rich_club[i])
+        for k, v in expected.rich_club[i].items():
+            assert np.isclose(batch.rich_club[i][k], v)
+
+    # batched mode seeds the adjacency, so each graph is converted only once
+    calls = []
+    nx2csr = grg_metrics.nx2csr
+    grg_metrics.nx2csr = lambda G, **kwargs: calls.append(G) or nx2csr(G, **kwargs)
+    try:
+        metrics = grg_metrics.compute_metrics(graphs, batched=True)
+    finally:
+        grg_metrics.nx2csr = nx2csr
+    assert len(calls) == len(graphs)
+    assert list(metrics.index) == Gids
+    assert np.allclose(metrics.max_degree, [max(dict(G.degree()).values()) for G in graphs])
+
+    # nothing to batch for the diameter alone
+    batch_metrics = grg_metrics.batch_metrics
+    grg_metrics.batch_metrics = None
+    try:
+        diameter = grg_metrics.compute_metrics(graphs, metrics=['diameter'], batched=True)
+    finally:
+        grg_metrics.batch_metrics = batch_metrics
+    assert (diameter.diameter == metrics.diameter).all()
+
+def test_spectral_density():
+    """KPM estimates should track the exact Laplacian spectrum."""
+    G = synthetic_graphs()[3]
+    A = nx.to_numpy_array(G)
+    eigenvalues = np.linalg.eigvalsh(np.diag(A.sum(axis=1)) - A)
+    est = grg_metrics.laplacian_spectral_density([G], ['G'], n_probes=32)['G']
+    exact = np.histogram(eigenvalues, est['bin_edges'])[0]/len(eigenvalues)
+    assert np.isclose(est['density'].sum(), 1)
+    assert np.abs(est['density'] - exact).sum() < 0.15
+    assert np.allclose(est['moments'][:2], [np.mean(eigenvalues), np.mean(eigenvalues**2)], rtol=0.05)
+
+    radius = grg_metrics.adj_spectral_radius([G], ['G'])['G']
+    assert np.isclose(radius, np.linalg.eigvalsh(A).max())
+
+def impedance_graph():
+    rng = np.random.RandomState(0)
+    G = synthetic_graphs()[2]
+    for u, v in G.edges():
+        G[u][v]['impedance'] = {'resistance': 0.01*rng.rand(), 'reactance': 0.01 + 0.1*rng.rand()}
+    G.add_edge(1000, 1001, impedance={'resistance': 0.0, 'reactance': {'lb': 0.1, 'ub': 0.3}})
+    G.graph['id'] = 'G'
+    return G
+
+def test_effective_resistance():
+    """Foster's theorem: sum of conductance times effective resistance over
+    the edges equals the number of nodes minus the number of components.
+    """
+    G = impedance_graph()
+    C = grg_metrics.conductance_matrix(G)
+    solver = grg_metrics.LaplacianSolver(C)
+    edges = list(G.edges())
+    R = grg_metrics.effective_resistance(G, edges, solver=solver)
+    conductance = np.array([1/grg_metrics.edge_impedance(G[u][v]) for u, v in edges])
+    assert np.isclose(conductance.dot(R), len(G) - 2)
+    assert np.isclose(R[-1], 0.2)
+    assert grg_metrics.effective_resistance(G, [(0, 1000)], solver=solver)[0] == np.inf
+
+    exact = grg_metrics.effective_resistance_metrics([G], ['G'], method='exact')
+    approx = grg_metrics.effective_resistance_metrics([G], ['G'], method='approx', n_projections=400)
+    assert np.isclose(exact.max_edge_effective_resistance['G'], R.max())
+    assert np.isclose(approx.average_effective_resistance['G'], exact.average_effective_resistance['G'], rtol=0.1)
+
+def test_impedance_path_metrics():
+    G = impedance_graph()
+    paths = grg_metrics.impedance_path_metrics([G], ['G'], chunk_size=16)
+    lengths = [d for source, targets in nx.shortest_path_length(G, weight=lambda u, v, d: grg_metrics.edge_impedance(d))
+               for target, d in targets.items() if source != target]
+    assert np.isclose(paths.average_impedance_path_length['G'], np.mean(lengths))
+    assert np.isclose(paths.impedance_diameter['G'], np.max(lengths))
+
+def test_weighted_metric_options():
+    """Weighted metric options go under the name of their shared input."""
+    G = impedance_graph()
+    options = {'effective_resistance_stats': {'weight': 'resistance', 'method': 'exact'},
+               'impedance_path_stats': {'weight': 'magnitude', 'chunk_size': 16}}
+    metrics = grg_metrics.compute_metrics([G], metrics=['average_effective_resistance', 'impedance_diameter'],
+                                          options=options)
+    resistance = grg_metrics.effective_resistance_metrics([G], ['G'], weight='resistance', method='exact')
+    paths = grg_metrics.impedance_path_metrics([G], ['G'], weight='magnitude')
+    assert metrics.average_effective_resistance['G'] == resistance.average_effective_resistance['G']
+    assert metrics.average_effective_resistance['G'] != grg_metrics.effective_resistance_stats(G)[0]
+    assert metrics.impedance_diameter['G'] == paths.impedance_diameter['G']
+
+def test_metric_registry():
+    graphs = synthetic_graphs()
+    metrics = grg_metrics.compute_metrics(graphs, metrics=['max_degree', 'rich_club'])
+    assert list(metrics.columns) == ['graph', 'nodes', 'edges', 'size', 'max_degree', 'rich_club']
+    default = grg_metrics.compute_metrics(graphs)
+    assert list(default.columns[4:]) == grg_metrics.DEFAULT_METRICS
+    assert (metrics.max_degree == default.max_degree).all()
+    assert grg_metrics.compute_metrics(graphs, metrics=['no_such_metric']) == []
+
+    # self-loops are dropped, unlike in nx.degree
+    G = nx.path_graph(3)
+    G.add_edge(1, 1)
+    G.graph['id'] = 'loop'
+    assert grg_metrics.compute_metrics([G], metrics=['max_degree']).max_degree['loop'] == 2
+
+    calls = []
+    def leaves(G, degree):
+        calls.append(G.graph['id'])
+        return degree == 1
+    grg_metrics.register_input('leaves', leaves, requires=['degree'])
+    grg_metrics.register_metric('leaf_count', lambda G, leaves, scale=1: scale*leaves.sum(), requires=['leaves'])
+    grg_metrics.register_metric('leaf_share', lambda G, leaves: leaves.mean(), requires=['leaves'])
+    try:
+        assert grg_metrics.metric_dependencies(['leaf_count']) == ['adjacency', 'degree', 'leaves', 'leaf_count']
+        metrics = grg_metrics.compute_metrics(graphs, metrics=['leaf_count', 'leaf_share'],
+                                              options={'leaf_count': {'scale': 2}})
+        assert calls == [G.graph['id'] for G in graphs]
+        assert (metrics.leaf_count == 2*metrics.leaf_share*metrics.nodes).all()
+
+        # an alternative is used only when its inputs are computed anyway
+        grg_metrics.register_metric('leaf_total', lambda G, degree: calls.append('direct') or np.sum(degree == 1),
+                                    requires=['degree'], alternatives=[(lambda G, leaves: leaves.sum(), ['leaves'])])
+        del calls[:]
+        alone = grg_metrics.compute_metrics(graphs, metrics=['leaf_total'])
+        assert calls == ['direct']*len(graphs)
+        del calls[:]
+        shared = grg_metrics.compute_metrics(graphs, metrics=['leaf_total', 'leaf_share'])
+        assert calls == [G.graph['id'] for G in graphs]
+        assert (alone.leaf_total == shared.leaf_total).all()
+    finally:
+        for name in ['leaves', 'leaf_count', 'leaf_share', 'leaf_total']:
+            del grg_metrics.METRICS[name]
+
+def test_eccentricity():
+    """Bound-pruned eccentricities must match all-pairs BFS, per component."""
+    G = nx.disjoint_union_all(synthetic_graphs()[1:] + [nx.random_tree(200, seed=0), nx.path_graph(2), nx.empty_graph(1)])
+    A = grg_metrics.nx2csr(G)
+    distances = dict(nx.all_pairs_shortest_path_length(G))
+    expected = np.array([max(distances[v].values()) for v in G.nodes()])
+    ecc = grg_metrics.eccentricities(A)
+    assert np.array_equal(ecc, expected)
+    largest = [i for i, v in enumerate(G.nodes()) if v in max(nx.connected_components(G), key=len)]
+    assert grg_metrics.diameter_radius(A) == (expected.max(), expected[largest].min())
+
+    # diameter and radius come from the eccentricities, with no extra BFS runs
+    calls = []
+    bfs = grg_metrics.distance._bfs
+    grg_metrics.distance._bfs = lambda A, source: calls.append(source) or bfs(A, source)
+    try:
+        grg_metrics.eccentricities(A)
+        nbfs = len(calls)
+        G.graph['id'] = 'G'
+        metrics = grg_metrics.compute_metrics([G], compute_eccentricity=True)
+    finally:
+        grg_metrics.distance._bfs = bfs
+    assert len(calls) == 2*nbfs
+    assert metrics.diameter['G'] == expected.max()
+    assert metrics.radius['G'] == expected[largest].min()
+    assert np.isclose(metrics.mean_eccentricity['G'], expected.mean())
+
+def test_spectral_density_moment_count():
+    G = synthetic_graphs()[0]
+    with pytest.raises(ValueError, match='n_moments'):
+        grg_metrics.compute_metrics([G], metrics=['adj_spectral_density'],
+                                    options={'adj_spectral_density': {'n_moments': 4}})
+    metrics = grg_metrics.compute_metrics([G], metrics=['adj_spectral_density'],
+                                          options={'adj_spectral_density': {'n_moments': 5}})
+    assert len(metrics.adj_spectral_density[G.graph['id']]['moments']) == 4
+
+def test_approx_max_edge_resistance():
+    """The approximate maximum is refined with exact solves, so it must match."""
+    G = impedance_graph()
+    exact = grg_metrics.effective_resistance_metrics([G], ['G'], method='exact')
+    approx = grg_metrics.effective_resistance_metrics([G], ['G'], method='approx', n_projections=20)
+    assert np.isclose(approx.max_edge_effective_resistance['G'], exact.max_edge_effective_resistance['G'])
+
+    # every candidate is solved, however many chunks that takes
+    C = grg_metrics.conductance_matrix(G)
+    solver = grg_metrics.LaplacianSolver(C)
+    E = sp.triu(C, k=1).tocoo()
+    R = grg_metrics.weighted._edge_resistance(E, np.arange(len(E.data)), solver)
+    estimate = R*np.linspace(1.5, 0.5, len(R))
+    refined = grg_metrics.weighted._refine_max_edge_resistance(E, estimate, solver, 100, chunk_size=4)
+    assert np.isclose(refined.max(), R.max())
+    assert (refined <= np.maximum(estimate, R) + 1e-12).all()